@@ -1,191 +1,496 @@
 import os
-from exa_py import Exa
+import sys
 import google.generativeai as genai
 from dotenv import load_dotenv
-import textwrap
-import requests
+import io
+import asyncio
+import aiohttp
 import argparse
 from datetime import datetime, timedelta
 import re
+import threading
+import time
+import itertools
+from collections import deque
+
+# orjson decodes API responses faster; fall back to the standard library if it isn't installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
  
 load_dotenv()
 
-exa = Exa(api_key=os.getenv('EXA_API_KEY'))
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-1.5-flash-latest')
 
-def search_with_exa(query, num_results=5, is_weather=False):
+# This is the crucial prompt for the RAG system.
+SYSTEM_INSTRUCTIONS = """You are a helpful AI assistant. Your knowledge is limited to ONLY the context provided below from a recent web search.
+    Instructions:
+    1. Answer the user's question based STRICTLY on the provided context.
+    2. If the context does not contain the answer, you must clearly state "I cannot find a definitive answer based on the recent search results."
+    3. Be concise, informative, and factual.
+    4. Cite your sources by referring to the source numbers in brackets (e.g., [Source 1]) throughout your answer.
     """
-    Uses Exa.ai to search the web and retrieve clean text content from the top results.
-    Optimized for weather queries with better sources.
+
+# Fixed pieces of the per-question prompts, built once so each call only joins in the context and question
+QUESTION_PREFIX = "\n\nUser Question: "
+ANSWER_PROMPT_SUFFIX = "\n\nNow, provide your answer based on the context above:\n"
+BATCH_PROMPT_HEADER = (
+    "Answer each of the following questions independently, using only the context given for that question.\n\n"
+    "Start each answer on its own line with a heading of the form '### Answer N', where N is the question number."
+)
+
+# The fixed instructions are attached to the model, so each call only sends the context and question
+model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=SYSTEM_INSTRUCTIONS)
+
+# Shared HTTP session for the weather and Exa APIs, created in main() once the event loop is running
+HTTP_TIMEOUT_SECONDS = 5
+HTTP_POOL_LIMIT = 16
+DNS_CACHE_TTL_SECONDS = 300
+EXA_SEARCH_URL = "https://api.exa.ai/search"
+EXA_TIMEOUT_SECONDS = 30
+_http_session = None
+
+# Geocoding results keyed by normalized city name; coordinates don't change between questions,
+# and the weather calls need them first, so a cached city saves a full round trip per question
+_GEO_CACHE_MAXSIZE = 512
+_geo_cache = {}
+
+# Searches start with a few results and only fetch the full --num-results when those are thin.
+# The common case is one request for 3 result bodies instead of N. The thin case costs a second
+# request in series for all N results: Exa can't exclude URLs already returned, so that is 3+N
+# result bodies, more than a single request for N would have been.
+ADAPTIVE_INITIAL_RESULTS = 3
+ADAPTIVE_MIN_CONTEXT_CHARS = 1500
+
+# Exa results keyed by (normalized query, num_results, is_weather); kept briefly since search results go stale
+SEARCH_CACHE_TTL_SECONDS = 600
+SEARCH_CACHE_MAXSIZE = 128
+_search_cache = {}
+
+# Date and keyword patterns for weather queries, compiled once at import
+_MONTH_NAMES = ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                'august', 'september', 'october', 'november', 'december')
+_MONTHS = {name: number for number, name in enumerate(_MONTH_NAMES, start=1)}
+_ORDINAL_RE = re.compile(r'(\d+)(st|nd|rd|th)')
+_DATE_PATTERNS = [
+    ('tomorrow', re.compile(r'tomorrow')),
+    ('today', re.compile(r'today')),
+    ('day_month', re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s+(' + '|'.join(_MONTH_NAMES) + ')')),
+]
+
+# Stems that mark a question as a weather query, matched against the start of each word so that
+# inflections count ("raining", "rainy", "temperatures") while words like "train" don't
+_WORD_RE = re.compile(r'[a-z]+')
+_WEATHER_TRIGGERS = ('weather', 'temperature', 'forecast', 'humidity', 'rain', 'snow')
+
+# Longest page text requested from Exa and passed to Gemini for a result without highlights
+CONTEXT_PREVIEW_CHARS = 500
+
+# Separators between the individual questions of a multi-question query
+_SUBQUERY_SPLIT_RE = re.compile(r'[?;]+')
+
+# Answer headings requested from Gemini in batch mode
+# (the answer text may continue on the heading line after a colon)
+_BATCH_ANSWER_RE = re.compile(r'^[ \t#*]*Answer (\d+)(?:[ \t*]*:[ \t*]*|[ \t*]*$)', re.MULTILINE)
+
+# Common weather-related words to ignore when looking for a city name
+_WEATHER_QUERY_WORDS = frozenset({'what', 'is', 'the', 'weather', 'temperature', 'of',
+                                  'forecast', 'in', 'at', 'for', 'today', 'tomorrow',
+                                  'how', 'hot', 'cold', 'humid', 'rain', 'snow', 'update',
+                                  'date', 'and', 'will', 'be', 'on'})
+
+def cache_get(cache, key):
     """
-    print(f"🔍 Searching the web for: '{query}'...")
-    
-    # Enhance weather queries with better sources
-    if is_weather and "weather" in query.lower():
-        query = f"{query} forecast weather.com OR accuweather.com OR wunderground.com OR timeanddate.com"
-    
-    try:
-        search_response = exa.search_and_contents(
-            query,
-            type="neural",
-            use_autoprompt=True,
-            text={
-                "max_characters": 2000,
-                "include_html_tags": False
+    Look up a key in one of the small in-memory caches (_geo_cache, _search_cache)
+    Returns: the cached value, or None if it is missing or has expired
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at is not None and time.monotonic() >= expires_at:
+        del cache[key]
+        return None
+    return value
+
+def cache_put(cache, key, value, max_size, ttl_seconds=None):
+    """
+    Store a value in one of the small in-memory caches, evicting the oldest entry once it holds
+    max_size entries (dicts keep insertion order). Entries without ttl_seconds never expire.
+    """
+    cache.pop(key, None)
+    if len(cache) >= max_size:
+        del cache[next(iter(cache))]
+    expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+    cache[key] = (expires_at, value)
+
+async def fetch_exa_results(query, num_results):
+    """
+    Calls Exa's /search endpoint directly over the shared aiohttp session.
+    Returns a list of result dicts (url, score, text, highlights, ...) or None on error.
+    """
+    payload = {
+        "query": query,
+        "type": "neural",
+        "useAutoprompt": True,
+        "numResults": num_results,
+        "contents": {
+            # Only used when a result has no highlights, and never shown past the preview length
+            "text": {
+                "maxCharacters": CONTEXT_PREVIEW_CHARS,
+                "includeHtmlTags": False
             },
-            highlights={
-                "highlights_per_url": 3,
-                "num_sentences": 2,
+            "highlights": {
+                "highlightsPerUrl": 3,
+                "numSentences": 2,
                 "query": query
-            }, 
-            num_results=num_results
-        )
-        return search_response.results
+            }
+        }
+    }
+    headers = {"x-api-key": os.getenv('EXA_API_KEY', ''), "Content-Type": "application/json"}
+    
+    try:
+        async with _http_session.post(EXA_SEARCH_URL, json=payload, headers=headers,
+                                      timeout=aiohttp.ClientTimeout(total=EXA_TIMEOUT_SECONDS)) as response:
+            if response.status != 200:
+                print(f"❌ Error calling Exa API: HTTP {response.status} for '{query}'")
+                return None
+            data = json_loads(await response.read())
+        return data.get('results', [])
     except Exception as e:
         print(f"❌ Error calling Exa API: {e}")
         return None
 
-def format_context(search_results):
+def result_content_length(result):
+    """
+    Number of characters a search result contributes to the prompt context.
+    """
+    if result.get('highlights'):
+        return len("... ".join(result['highlights']))
+    return len(result.get('text') or '')
+
+async def fetch_exa_results_adaptive(query, num_results):
+    """
+    Fetches a few results first and only asks Exa for the full num_results when those
+    don't carry enough content to answer from.
+    Returns a list of result dicts, empty if the search failed.
+    """
+    initial_results = min(num_results, ADAPTIVE_INITIAL_RESULTS)
+    results = await fetch_exa_results(query, initial_results)
+    
+    if results is None:
+        # The small request failed; make one plain request for everything instead of the two-step path
+        if initial_results == num_results:
+            return []
+        return await fetch_exa_results(query, num_results) or []
+    
+    # Nothing left to top up when the first request already asked for everything,
+    # and fewer results than asked for means Exa has nothing more to add
+    if (initial_results == num_results or len(results) < initial_results or
+            sum(map(result_content_length, results)) >= ADAPTIVE_MIN_CONTEXT_CHARS):
+        return results
+    
+    # Exa has no paging, so the second request returns the first results again; keep the new ones only
+    seen_urls = {result.get('url') for result in results}
+    for result in await fetch_exa_results(query, num_results) or []:
+        if result.get('url') not in seen_urls:
+            results.append(result)
+            seen_urls.add(result.get('url'))
+    return results[:num_results]
+
+def split_into_subqueries(query):
+    """
+    Splits a query made of several questions (separated by '?' or ';') into one search query per question.
+    """
+    subqueries = [part.strip() for part in _SUBQUERY_SPLIT_RE.split(query)]
+    subqueries = [part for part in subqueries if len(part) > 2]
+    return subqueries or [query]
+
+async def search_with_exa_async(query, num_results=5, is_weather=False):
+    """
+    Uses Exa.ai to search the web and retrieve clean text content from the top results.
+    Optimized for weather queries with better sources.
+    Multi-question queries are searched concurrently, one Exa request per question, and the results merged.
+    Results are cached for SEARCH_CACHE_TTL_SECONDS so repeating a question doesn't hit Exa again.
+    """
+    cache_key = (query.strip().lower(), num_results, is_weather)
+    cached = cache_get(_search_cache, cache_key)
+    if cached:
+        return cached
+    
+    results = await _search_exa_uncached(query, num_results, is_weather)
+    if results:
+        cache_put(_search_cache, cache_key, results, SEARCH_CACHE_MAXSIZE, SEARCH_CACHE_TTL_SECONDS)
+    return results
+
+async def _search_exa_uncached(query, num_results, is_weather):
+    """
+    Runs the Exa searches for a query, one request per subquery, and merges the results.
+    """
+    subqueries = split_into_subqueries(query)
+    
+    # Enhance weather queries with better sources
+    if is_weather:
+        subqueries = [f"{subquery} forecast weather.com OR accuweather.com OR wunderground.com OR timeanddate.com"
+                      if "weather" in subquery.lower() else subquery
+                      for subquery in subqueries]
+    
+    result_lists = await asyncio.gather(*(fetch_exa_results_adaptive(subquery, num_results) for subquery in subqueries))
+    if len(result_lists) == 1:
+        return result_lists[0] or None
+    
+    # Scores from different queries aren't comparable, so take results round-robin in each
+    # subquery's own ranking order; every question gets a share of the sources
+    merged = []
+    seen_urls = set()
+    for rank_results in itertools.zip_longest(*result_lists):
+        for result in rank_results:
+            if result is None or result.get('url') in seen_urls:
+                continue
+            merged.append(result)
+            seen_urls.add(result.get('url'))
+    return merged[:num_results] or None
+
+def preview_text(text, max_chars=CONTEXT_PREVIEW_CHARS):
+    """
+    Trims text to at most max_chars, cutting at a nearby word boundary when there is one.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(' ', max_chars - 100, max_chars)
+    return text[:cut if cut > 0 else max_chars] + "..."
+
+def write_context(buffer, search_results):
     """
-    Formats the search results into a single string of context for the LLM.
+    Writes the search results into the prompt buffer as context for the LLM.
     Includes source URLs for citation.
     """
     if not search_results:
-        return "No search results were found."
+        buffer.write("No search results were found.")
+        return
     
-    context_parts = ["Here is the context from a web search for your question:"]
+    buffer.write("Here is the context from a web search for your question:")
     for i, result in enumerate(search_results):
         content = ""
-        if hasattr(result, 'highlights') and result.highlights:
-            content = "... ".join(result.highlights)
-        elif hasattr(result, 'text') and result.text:
-            content = textwrap.shorten(result.text, width=500, placeholder="...")
+        if result.get('highlights'):
+            content = "... ".join(result['highlights'])
+        elif result.get('text'):
+            content = preview_text(result['text'])
         else:
             content = "No content available for this result."
         
-        context_parts.append(f"[Source {i+1}: {result.url}]\n{content}\n")
-    
-    return "\n\n".join(context_parts)
+        buffer.write(f"\n\n[Source {i+1}: {result.get('url')}]\n{content}\n")
 
-def generate_answer_with_gemini(user_query, context):
+def build_full_prompt(user_query, search_results):
     """
-    Sends the user query and retrieved context to Google's Gemini API to generate a final answer.
+    Builds the Gemini prompt for one question in a single pass: search context, then the question.
+    The system instructions are attached to the model, so they are not part of the prompt.
     """
-    print("🧠 Generating answer with Gemini...")
-    
-    # This is the crucial prompt for the RAG system.
-    system_instructions = """You are a helpful AI assistant. Your knowledge is limited to ONLY the context provided below from a recent web search.
-    Instructions:
-    1. Answer the user's question based STRICTLY on the provided context.
-    2. If the context does not contain the answer, you must clearly state "I cannot find a definitive answer based on the recent search results."
-    3. Be concise, informative, and factual.
-    4. Cite your sources by referring to the source numbers in brackets (e.g., [Source 1]) throughout your answer.
+    prompt = io.StringIO()
+    write_context(prompt, search_results)
+    prompt.write(QUESTION_PREFIX)
+    prompt.write(user_query)
+    prompt.write(ANSWER_PROMPT_SUFFIX)
+    return prompt.getvalue()
+
+def build_batch_prompt(user_queries, search_results_list):
     """
-    
-    # Combine the instructions, context, and user question into a single prompt for Gemini
-    full_prompt = f"""{system_instructions}
+    Builds one Gemini prompt asking several questions, each followed by its own search context.
+    """
+    prompt = io.StringIO()
+    prompt.write(BATCH_PROMPT_HEADER)
+    for i, (user_query, search_results) in enumerate(zip(user_queries, search_results_list)):
+        prompt.write(f"\n\n--- Question {i+1} ---\n")
+        write_context(prompt, search_results)
+        prompt.write(QUESTION_PREFIX)
+        prompt.write(user_query)
+    return prompt.getvalue()
 
-    {context}
+def print_prompt_preview(full_prompt):
+    """
+    Prints the start of a prompt for debugging (--debug).
+    """
+    print("\n--- Prompt Sent to Gemini ---")
+    print(full_prompt[:1000] + "..." if len(full_prompt) > 1000 else full_prompt)
 
-    User Question: {user_query}
+def generate_answer_with_gemini(full_prompt):
+    """
+    Sends a prompt from build_full_prompt to Google's Gemini API and streams the answer to the terminal.
+    Returns the full answer text once generation is complete.
+    """
+    print("🧠 Generating answer with Gemini...")
+    
+    # Present the answer to the user as it is generated
+    print("\n" + "="*50)
+    print("Answer:")
+    print("="*50)
     
-    Now, provide your answer based on the context above:
+    answer_parts = []
+    try:
+        # Stream the response so the answer starts printing at the first token instead of the last
+        for chunk in model.generate_content(full_prompt, stream=True):
+            sys.stdout.write(chunk.text)
+            sys.stdout.flush()
+            answer_parts.append(chunk.text)
+    except Exception as e:
+        error_message = f"❌ Error calling Gemini API: {e}"
+        print(("\n" if answer_parts else "") + error_message)
+        answer_parts.append(error_message)
+    print()
+    
+    return "".join(answer_parts)
+
+def generate_batch_answers_with_gemini(full_prompt, num_questions):
+    """
+    Answers all the questions in a prompt from build_batch_prompt with a single Gemini call.
+    Returns the raw response text, to be split with split_batch_answers.
     """
+    print(f"🧠 Generating answers for {num_questions} questions with Gemini...")
     
     try:
-        # Generate content using the combined prompt
-        response = model.generate_content(full_prompt)
-        return response.text
+        return model.generate_content(full_prompt).text
     except Exception as e:
         return f"❌ Error calling Gemini API: {e}"
 
-def is_date_beyond_forecast_range(date_str):
+def split_batch_answers(response_text, num_questions):
+    """
+    Splits a batch response on its '### Answer N' headings.
+    Returns (preamble, answers) with one answer per question in order, or None unless
+    the response has exactly the headings 1..num_questions in order.
+    """
+    # re.split with a capture group gives [preamble, number, answer, number, answer, ...]
+    pieces = _BATCH_ANSWER_RE.split(response_text)
+    numbers = [int(number) for number in pieces[1::2]]
+    if numbers != list(range(1, num_questions + 1)):
+        return None
+    return (pieces[0].strip(), [answer.strip() for answer in pieces[2::2]])
+
+def parse_day_month(date_text, year):
+    """
+    Parse a "5 september" / "31st august" style date in the given year
+    Raises ValueError if the text isn't a valid day followed by a month name
+    """
+    # Remove ordinal suffixes (st, nd, rd, th)
+    date_clean = _ORDINAL_RE.sub(r'\1', date_text)
+    try:
+        day_str, month_str = date_clean.split()
+        return datetime(year, _MONTHS[month_str.lower()], int(day_str)).date()
+    except (KeyError, ValueError):
+        # Fall back to strptime for anything the lookup table doesn't cover
+        return datetime.strptime(f"{date_clean} {year}", "%d %B %Y").date()
+
+def is_date_beyond_forecast_range(date_str, now=None):
     """
     Check if a date is beyond the 5-day forecast range of OpenWeatherMap API
+    now: the caller's clock snapshot, so all date math for one question uses the same instant
     """
     try:
         if not date_str:
             return False
-            
+        
+        today = (now or datetime.now()).date()
         if isinstance(date_str, str):
             # Handle relative dates
             if date_str.lower() in ['today', 'now']:
-                target_date = datetime.now().date()
+                target_date = today
             elif date_str.lower() == 'tomorrow':
-                target_date = (datetime.now() + timedelta(days=1)).date()
+                target_date = today + timedelta(days=1)
             else:
                 # Handle various date formats including ordinal numbers (1st, 2nd, etc.)
-                date_clean = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
-                current_year = datetime.now().year
-                date_obj = datetime.strptime(f"{date_clean} {current_year}", "%d %B %Y")
-                target_date = date_obj.date()
+                target_date = parse_day_month(date_str, today.year)
         else:
             target_date = date_str
         
-        max_forecast_date = datetime.now().date() + timedelta(days=4)
+        max_forecast_date = today + timedelta(days=4)
         return target_date > max_forecast_date
         
     except ValueError:
         return False
 
-def get_weather_forecast(city="Mohali", date=None):
+async def fetch_geo(city, api_key):
+    """
+    Look up a city with the OpenWeatherMap geocoding API
+    Returns: (lat, lon, city_name) or None if the city could not be found
+    Successful lookups are cached for the rest of the session, so repeat questions about a city
+    go straight to the weather request
+    """
+    cache_key = city.lower().strip()
+    cached = cache_get(_geo_cache, cache_key)
+    if cached:
+        return cached
+    
+    geo_url = f"https://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={api_key}"
+    async with _http_session.get(geo_url) as geo_response:
+        if geo_response.status != 200:
+            return None
+        locations = json_loads(await geo_response.read())
+    
+    if not locations:
+        return None
+    
+    location = locations[0]
+    geo = (location['lat'], location['lon'], location.get('name', city))  # Use the official city name from API
+    cache_put(_geo_cache, cache_key, geo, _GEO_CACHE_MAXSIZE)
+    return geo
+
+async def fetch_weather_json(url):
+    """
+    GET an OpenWeatherMap endpoint
+    Returns: (status_code, data) where data is None for non-200 responses
+    """
+    async with _http_session.get(url) as response:
+        if response.status != 200:
+            return (response.status, None)
+        return (response.status, json_loads(await response.read()))
+
+async def get_weather_forecast(city="Mohali", date=None, now=None):
     """
     Get weather forecast data from OpenWeatherMap API for a specific date
     Works for any city worldwide
+    now: the caller's clock snapshot, so all date math for one question uses the same instant
     """
     api_key = os.getenv('OPENWEATHER_API_KEY')
     if not api_key:
         return "Weather API key not configured. Please add OPENWEATHER_API_KEY to your .env file"
     
+    # If no specific date requested, return current weather
+    if not date:
+        return await get_current_weather(city)
+    
     try:
         # First get coordinates for the city
-        geo_url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={api_key}"
-        geo_response = requests.get(geo_url)
-        
-        if geo_response.status_code != 200 or not geo_response.json():
+        geo = await fetch_geo(city, api_key)
+        if not geo:
             return f"City '{city}' not found. Please check the city name."
-            
-        location = geo_response.json()[0]
-        lat, lon = location['lat'], location['lon']
-        city_name = location.get('name', city)  # Use the official city name from API
         
-        # Get 5-day forecast
-        forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-        forecast_response = requests.get(forecast_url)
+        lat, lon, city_name = geo
         
-        if forecast_response.status_code != 200:
-            return f"Weather API error: {forecast_response.status_code}"
-            
-        forecast_data = forecast_response.json()
+        # Get 5-day forecast for the geocoded location, so it matches the city name shown
+        forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric"
+        forecast_status, forecast_data = await fetch_weather_json(forecast_url)
         
-        # If no specific date requested, return current weather
-        if not date:
-            current_weather = get_current_weather(city)
-            return current_weather
+        if forecast_status != 200:
+            return f"Weather API error: {forecast_status}"
             
         # Parse the requested date
+        today = (now or datetime.now()).date()
         try:
             if isinstance(date, str):
                 # Handle relative dates
                 if date.lower() in ['today', 'now']:
-                    target_date = datetime.now().date()
+                    target_date = today
                 elif date.lower() == 'tomorrow':
-                    target_date = (datetime.now() + timedelta(days=1)).date()
+                    target_date = today + timedelta(days=1)
                 else:
                     # Try to parse date string (e.g., "5 september", "31st august")
-                    # Remove ordinal suffixes (st, nd, rd, th)
-                    date_clean = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date)
-                    current_year = datetime.now().year
-                    date_str = f"{date_clean} {current_year}"
-                    target_date = datetime.strptime(date_str, "%d %B %Y").date()
+                    target_date = parse_day_month(date, today.year)
             else:
                 target_date = date
         except ValueError:
             return f"Could not understand the date '{date}'. Please use formats like 'today', 'tomorrow', or '5 September'."
         
         # Check if date is within 5-day forecast range
-        today = datetime.now().date()
         max_forecast_date = today + timedelta(days=4)  # 5-day forecast includes today + 4 days
         
         if target_date < today:
@@ -194,19 +499,22 @@ def get_weather_forecast(city="Mohali", date=None):
         if target_date > max_forecast_date:
             return f"Forecast not available for {target_date.strftime('%B %d')}. The OpenWeatherMap API only provides 5-day forecasts (up to {max_forecast_date.strftime('%B %d')})."
         
-        # Find forecast for the target date
-        forecasts_for_date = []
+        # Pick the forecast closest to midday on the target date in a single pass over the
+        # 3-hourly entries, comparing raw timestamps against the local day's bounds
+        day_start = int(datetime.combine(target_date, datetime.min.time()).timestamp())
+        day_end = int(datetime.combine(target_date + timedelta(days=1), datetime.min.time()).timestamp())
+        best_forecast = None
+        best_distance = None
         for forecast in forecast_data['list']:
-            forecast_date = datetime.fromtimestamp(forecast['dt']).date()
-            if forecast_date == target_date:
-                forecasts_for_date.append(forecast)
+            if day_start <= forecast['dt'] < day_end:
+                distance_from_midday = abs((forecast['dt'] - day_start) // 3600 - 12)
+                if best_distance is None or distance_from_midday < best_distance:
+                    best_forecast = forecast
+                    best_distance = distance_from_midday
         
-        if not forecasts_for_date:
+        if best_forecast is None:
             return f"No forecast available for {target_date.strftime('%B %d')} in {city_name}."
         
-        # Get the most relevant forecast (usually midday)
-        best_forecast = max(forecasts_for_date, key=lambda x: 12 - abs(datetime.fromtimestamp(x['dt']).hour - 12))
-        
         # Format weather forecast
         date_str = target_date.strftime('%B %d')
         return (f"Weather forecast for {city_name} on {date_str}: "
@@ -214,10 +522,12 @@ def get_weather_forecast(city="Mohali", date=None):
                 f"Temperature: {best_forecast['main']['temp']}°C, "
                 f"Humidity: {best_forecast['main']['humidity']}%")
     
+    except asyncio.TimeoutError:
+        return f"Error fetching weather forecast: request timed out after {HTTP_TIMEOUT_SECONDS} seconds"
     except Exception as e:
         return f"Error fetching weather forecast: {str(e)}"
 
-def get_current_weather(city="Mohali"):
+async def get_current_weather(city="Mohali"):
     """
     Get current weather data from OpenWeatherMap API for any city worldwide
     """
@@ -226,32 +536,26 @@ def get_current_weather(city="Mohali"):
         return "Weather API key not configured. Please add OPENWEATHER_API_KEY to your .env file"
     
     try:
-        # First get coordinates for the city to get the official name
-        geo_url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={api_key}"
-        geo_response = requests.get(geo_url)
-        
-        if geo_response.status_code != 200 or not geo_response.json():
+        # First get coordinates and the official name for the city
+        geo = await fetch_geo(city, api_key)
+        if not geo:
             return f"City '{city}' not found. Please check the city name."
-            
-        location = geo_response.json()[0]
-        city_name = location.get('name', city)  # Use the official city name from API
         
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city_name}&appid={api_key}&units=metric"
-        response = requests.get(url)
+        lat, lon, city_name = geo
         
-        if response.status_code == 404:
-            return f"City '{city_name}' not found. Please check the city name."
-        elif response.status_code != 200:
-            return f"Weather API error: {response.status_code}"
-            
-        response.raise_for_status()
-        data = response.json()
+        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
+        status, data = await fetch_weather_json(url)
+        
+        if status != 200:
+            return f"Weather API error: {status}"
         
         # Format weather data
         return (f"Current weather in {city_name}: {data['weather'][0]['description'].title()}, "
                 f"Temperature: {data['main']['temp']}°C, "
                 f"Humidity: {data['main']['humidity']}%")
     
+    except asyncio.TimeoutError:
+        return f"Error fetching weather: request timed out after {HTTP_TIMEOUT_SECONDS} seconds"
     except Exception as e:
         return f"Error fetching weather: {str(e)}"
 
@@ -263,33 +567,19 @@ def extract_weather_info_from_query(query):
     # Remove question marks and make lowercase
     query = query.lower().replace('?', '')
     
-    # Common weather-related words to ignore
-    weather_keywords = {'what', 'is', 'the', 'weather', 'temperature', 'of', 
-                       'forecast', 'in', 'at', 'for', 'today', 'tomorrow',
-                       'how', 'hot', 'cold', 'humid', 'rain', 'snow', 'update',
-                       'date', 'and', 'will', 'be', 'on'}
-    
     # Extract date information
     date = None
-    date_patterns = [
-        r'tomorrow',
-        r'today',
-        r'(\d{1,2})(?:st|nd|rd|th)?\s+(january|february|march|april|may|june|july|august|september|october|november|december)',
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, query)
+    for kind, pattern in _DATE_PATTERNS:
+        match = pattern.search(query)
         if match:
-            if pattern == r'tomorrow':
-                date = 'tomorrow'
-            elif pattern == r'today':
-                date = 'today'
-            else:
+            if kind == 'day_month':
                 day = match.group(1)
                 month = match.group(2)
                 date = f"{day} {month}"
+            else:
+                date = kind
             # Remove the date part from the query to help city extraction
-            query = re.sub(pattern, '', query)
+            query = pattern.sub('', query)
             break
     
     # Extract city name - look for words that aren't weather keywords
@@ -301,13 +591,13 @@ def extract_weather_info_from_query(query):
         in_index = words.index('in')
         if in_index + 1 < len(words):
             potential_city = words[in_index + 1]
-            if potential_city not in weather_keywords and len(potential_city) > 2:
+            if potential_city not in _WEATHER_QUERY_WORDS and len(potential_city) > 2:
                 return (potential_city.capitalize(), date)
     
     # If no "in" found, look for words that might be city names
     for word in words:
-        if (word not in weather_keywords and len(word) > 2 and 
-            not word.isdigit() and not re.match(r'^\d', word)):
+        if (word not in _WEATHER_QUERY_WORDS and len(word) > 2 and 
+            not word[0].isdigit()):
             potential_cities.append(word)
     
     # Return the longest potential city name (most specific)
@@ -342,18 +632,87 @@ def get_valid_input(prompt, valid_responses=None):
         except Exception as e:
             print(f"Input error: {e}")
 
-def main():
+async def get_valid_input_async(prompt, valid_responses=None):
     """
-    Main function to run the simple RAG tool with an infinite question loop.
+    Get valid input from user without blocking the event loop, so background tasks keep running
+    The prompt runs on a daemon thread so a pending input() never holds up interpreter exit
     """
-    parser = argparse.ArgumentParser(description="RAG Tool with Exa.ai and Gemini")
-    parser.add_argument("query", nargs='?', help="Your question to research")
-    parser.add_argument("--num-results", type=int, default=5, help="Number of search results")
-    parser.add_argument("--city", default="Mohali", help="City for weather queries")
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
     
-    args = parser.parse_args()
+    def deliver(result, error):
+        if future.done():  # The waiting task was cancelled
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
     
-    print("\n=== Mini RAG Tool with Exa.ai and Gemini ===")
+    def read_input():
+        try:
+            result = get_valid_input(prompt, valid_responses)
+        except BaseException as e:  # Includes the SystemExit raised when the user exits
+            loop.call_soon_threadsafe(deliver, None, e)
+        else:
+            loop.call_soon_threadsafe(deliver, result, None)
+    
+    threading.Thread(target=read_input, daemon=True).start()
+    return await future
+
+async def answer_question_batch(batch, debug=False):
+    """
+    Answers a batch of queued questions with one Gemini call
+    batch: list of (user_query, search_task) pairs whose web searches are already running
+    """
+    user_queries = [user_query for user_query, _ in batch]
+    print(f"\n🔍 Collecting web search results for {len(batch)} questions...")
+    search_results_list = await asyncio.gather(*(search_task for _, search_task in batch), return_exceptions=True)
+    
+    for i, (user_query, results) in enumerate(zip(user_queries, search_results_list)):
+        if isinstance(results, Exception):
+            print(f"❌ Error during search for '{user_query}': {results}")
+            search_results_list[i] = None
+    
+    full_prompt = build_batch_prompt(user_queries, search_results_list)
+    if debug:
+        print_prompt_preview(full_prompt)
+    
+    response_text = generate_batch_answers_with_gemini(full_prompt, len(user_queries))
+    split_response = split_batch_answers(response_text, len(user_queries))
+    
+    if split_response is None:
+        # Couldn't match the answers to the questions, so show the response as it came back
+        print("\n" + "="*50)
+        print("Answers:")
+        print("="*50)
+        print(response_text)
+        return
+    
+    preamble, answers = split_response
+    if preamble:
+        print("\n" + preamble)
+    for i, (user_query, answer) in enumerate(zip(user_queries, answers)):
+        print("\n" + "="*50)
+        print(f"Answer {i+1}: {user_query}")
+        print("="*50)
+        print(answer)
+
+async def run_question_loop(args):
+    """
+    Run the infinite question loop until the user quits.
+    With --batch N, questions are queued and answered N at a time with a single Gemini call.
+    """
+    pending = deque()
+    
+    async def prompt_user(prompt, valid_responses=None):
+        # End of input (Ctrl-D / EOF) exits like 'quit', so answer anything already queued first
+        try:
+            return await get_valid_input_async(prompt, valid_responses)
+        except SystemExit:
+            if pending:
+                print(f"Answering {len(pending)} queued question(s) before exiting...")
+                await answer_question_batch(list(pending), args.debug)
+            raise
     
     while True:
         # Get user input if not provided as argument
@@ -361,44 +720,65 @@ def main():
             user_query = args.query
             args.query = None  # Clear query to allow interactive input in next iteration
         else:
-            user_query = get_valid_input("\nPlease enter your question (or 'quit' to exit): ")
+            user_query = await prompt_user("\nPlease enter your question (or 'quit' to exit): ")
         
         if not user_query:
             continue
             
         if user_query.lower() in ['quit', 'exit', 'q']:
+            # Answer anything still waiting for a full batch before leaving
+            if pending:
+                await answer_question_batch(list(pending), args.debug)
             print("Goodbye!")
             break
         
         # Check if this is a weather query
-        weather_keywords = ['weather', 'temperature', 'forecast', 'humidity', 'rain', 'snow']
-        is_weather_query = any(keyword in user_query.lower() for keyword in weather_keywords)
+        query_words = _WORD_RE.findall(user_query.lower())
+        is_weather_query = any(word.startswith(_WEATHER_TRIGGERS) for word in query_words)
+        
+        # Start the web search right away so it runs during the weather lookup and any follow-up prompt
+        search_task = asyncio.create_task(
+            search_with_exa_async(user_query, args.num_results, is_weather=is_weather_query)
+        )
         
         if is_weather_query:
             city, date = extract_weather_info_from_query(user_query)
+            now = datetime.now()  # One clock reading for all of this question's date math
             
             # Check if date is beyond API range
-            if date and is_date_beyond_forecast_range(date):
+            if date and is_date_beyond_forecast_range(date, now):
                 print(f"📅 Date beyond 5-day forecast range. Searching web for weather information...")
                 weather_info = None
             else:
                 if date:
-                    weather_info = get_weather_forecast(city, date)
+                    weather_info = await get_weather_forecast(city, date, now)
                 else:
-                    weather_info = get_current_weather(city)
+                    weather_info = await get_current_weather(city)
                 
                 if weather_info:
                     print(f"\n🌤️  {weather_info}")
                     
                     # Only ask about additional search if API provided valid data
                     if "not available" not in weather_info.lower() and "error" not in weather_info.lower():
-                        proceed = get_valid_input("\nWould you like additional information? (y/n): ", ['y', 'n', 'yes', 'no'])
+                        proceed = await prompt_user("\nWould you like additional information? (y/n): ", ['y', 'n', 'yes', 'no'])
                         if proceed in ['n', 'no']:
+                            search_task.cancel()
                             continue
         
         # If weather API couldn't provide data or it's not a weather query, proceed with web search
+        if args.batch > 1:
+            # Queue the question; its search keeps running while the user types the next one
+            pending.append((user_query, search_task))
+            if len(pending) < args.batch:
+                print(f"📥 Question queued ({len(pending)}/{args.batch}).")
+                continue
+            await answer_question_batch(list(pending), args.debug)
+            pending.clear()
+            continue
+        
+        print(f"🔍 Searching the web for: '{user_query}'...")
         try:
-            search_results = search_with_exa(user_query, args.num_results, is_weather=is_weather_query)
+            search_results = await search_task
         except Exception as e:
             print(f"❌ Error during search: {e}")
             continue
@@ -407,25 +787,59 @@ def main():
             print("Failed to retrieve search results. Continuing to next query.")
             continue
         
-        # Format the results into a context string
-        context = format_context(search_results)
+        # Build the prompt straight from the search results
+        full_prompt = build_full_prompt(user_query, search_results)
         
-        # (Optional) Print context for debugging
-        print("\n--- Retrieved Context ---")
-        print(context[:1000] + "..." if len(context) > 1000 else context)
+        if args.debug:
+            print_prompt_preview(full_prompt)
         
-        # Generate a final answer using the context and Gemini
-        final_answer = generate_answer_with_gemini(user_query, context)
-        
-        # Present the answer to the user
-        print("\n" + "="*50)
-        print("Answer:")
-        print("="*50)
-        print(final_answer)
+        # Generate a final answer using the context and Gemini, streamed to the terminal
+        generate_answer_with_gemini(full_prompt)
+
+def positive_int(value):
+    """
+    argparse type for options that must be at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+async def main():
+    """
+    Main function to run the simple RAG tool with an infinite question loop.
+    """
+    global _http_session
+    
+    parser = argparse.ArgumentParser(description="RAG Tool with Exa.ai and Gemini")
+    parser.add_argument("query", nargs='?', help="Your question to research")
+    parser.add_argument("--num-results", type=positive_int, default=5,
+                        help="Maximum number of search results (the first 3 are fetched, more only if they are thin)")
+    parser.add_argument("--city", default="Mohali", help="City for weather queries")
+    parser.add_argument("--batch", type=positive_int, default=1,
+                        help="Answer questions in batches of this size with one Gemini call per batch")
+    parser.add_argument("--debug", action="store_true", help="Print the start of each prompt sent to Gemini")
+    
+    args = parser.parse_args()
+    
+    print("\n=== Mini RAG Tool with Exa.ai and Gemini ===")
+    
+    # One session for the whole run so weather and search requests reuse pooled keep-alive connections
+    _http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=HTTP_POOL_LIMIT, ttl_dns_cache=DNS_CACHE_TTL_SECONDS),
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS)
+    )
+    try:
+        await run_question_loop(args)
+    finally:
+        await _http_session.close()
 
 # Run the main function if the script is executed directly
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\nExiting program. Goodbye!")
\ No newline at end of file